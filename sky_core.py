@@ -0,0 +1,281 @@
+"""Shared ephemeris and plotting code for the Planet Tracker app.
+
+Keeps the expensive astronomy and matplotlib work in one place, behind
+Streamlit caches, so the app script stays a thin layer of widgets.
+"""
+
+import datetime
+import io
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+import erfa
+import numpy as np
+import matplotlib.pyplot as plt
+import streamlit as st
+from matplotlib.lines import Line2D
+from astropy.coordinates import EarthLocation, get_body, solar_system_ephemeris
+from astropy.time import Time
+from astropy import units as u
+from astropy.utils import iers
+
+# Allow a stale IERS table so the app keeps working offline
+iers.conf.auto_max_age = None
+
+# The analytical builtin ephemeris is pure C with no file download and is
+# accurate to well under the ~1 degree the polar plot can resolve
+solar_system_ephemeris.set('builtin')
+
+plt.rcParams["font.family"] = "Segoe UI Emoji"
+
+# Tracked bodies with display labels and colors, frozen at module scope so
+# reruns never rebuild them
+PLANET_NAMES = ('mercury', 'venus', 'mars', 'jupiter', 'saturn',
+                'uranus', 'neptune', 'sun', 'moon')
+PLANET_LABELS = np.array(['Mercury', 'Venus', 'Mars', 'Jupiter', 'Saturn',
+                          'Uranus', 'Neptune', 'Sun', 'Moon'])
+PLANET_COLORS = np.array(['blue', 'orange', 'red', 'green', 'purple',
+                          'cyan', 'darkblue', 'yellow', 'white'])
+
+# Bodies too faint to ever see in daylight; their positions are not worth
+# computing while the sun is up
+SKIP_IF_DAY = frozenset({'uranus', 'neptune'})
+
+# The ephemeris math under get_body runs in C code that releases the GIL,
+# so a small thread pool computes the bodies in parallel on cache misses
+_body_pool = ThreadPoolExecutor(max_workers=4)
+
+
+@st.cache_resource
+def _iers_init():
+    # Fetch the IERS table once per process; the first coordinate transform
+    # otherwise triggers a slow network download on every cold start
+    iers.IERS_Auto.open()
+    return True
+
+
+@st.cache_resource
+def make_location(lat, lon):
+    # EarthLocation construction parses units and caches ITRS internals;
+    # reuse one instance per (lat, lon) instead of rebuilding every rerun
+    return EarthLocation(lat=lat * u.deg, lon=lon * u.deg)
+
+
+@lru_cache(maxsize=4096)
+def _cached_body(name, jd_utc, lat, lon):
+    # Rounding the JD to 1e-6 day (~0.09 s) lets reruns within the same
+    # instant reuse the ephemeris interpolation instead of redoing it
+    t = Time(jd_utc, format="jd")
+    return get_body(name, t, make_location(lat, lon))
+
+
+def _radec_arrays(names, jd_utc, lat, lon):
+    # Fetch point for the visibility plot's single-instant coordinates,
+    # backed by the LRU cache so repeated reruns reuse the interpolation.
+    # The rise/set grid fetches its 30-point time arrays via get_body
+    # directly; pushing those through the scalar cache would just churn it.
+    bodies = list(_body_pool.map(
+        lambda name: _cached_body(name, jd_utc, lat, lon), names))
+    ra_rad = np.array([b.ra.radian for b in bodies])
+    dec_rad = np.array([b.dec.radian for b in bodies])
+    return ra_rad, dec_rad
+
+
+def _project(alt_deg, az_deg):
+    # Fused horizon filter + polar projection: one pass producing the
+    # plot-ready theta (az in radians) and radius (90 - alt, zenith at
+    # the center) for the visible bodies
+    mask = alt_deg > 0.0
+    theta = np.radians(az_deg[mask])
+    radius = 90.0 - alt_deg[mask]
+    return theta, radius, mask
+
+
+@st.cache_data(ttl=60)
+def compute_visible(lat, lon, utc_minute_iso):
+    """Return (theta, radius, labels, colors, is_night, is_day) for every
+    body above the horizon at the given minute-resolution UTC time, with
+    theta/radius already in polar-plot coordinates.
+
+    Keyed on (lat, lon, minute) so Streamlit reruns with unchanged inputs
+    skip the ephemeris and transform work entirely.
+    """
+    _iers_init()
+    time_utc = Time(utc_minute_iso)
+
+    jd_utc = round(time_utc.jd, 6)
+
+    # One astrometry context per instant; pressure=0 disables refraction,
+    # matching astropy's default AltAz frame
+    astrom, _ = erfa.apco13(time_utc.jd1, time_utc.jd2, 0.0,
+                            np.radians(lon), np.radians(lat), 0.0,
+                            0.0, 0.0, 0.0, 0.0, 0.0, 0.55)
+
+    def observed(ra_rad, dec_rad):
+        ri, di = erfa.atciqz(ra_rad, dec_rad, astrom)
+        az_rad, zen_rad, _, _, _ = erfa.atioq(ri, di, astrom)
+        return 90.0 - np.degrees(zen_rad), np.degrees(az_rad)
+
+    # The sun decides day/night and which bodies are worth computing
+    sun = _cached_body('sun', jd_utc, lat, lon)
+    sun_alt, sun_az = observed(sun.ra.radian, sun.dec.radian)
+    sun_alt = float(sun_alt)
+    is_night = sun_alt < -6
+    is_day = sun_alt > 0
+
+    others = np.array([i for i, name in enumerate(PLANET_NAMES)
+                       if name != 'sun' and not (is_day and name in SKIP_IF_DAY)])
+
+    # Batch the remaining body positions into RA/Dec arrays and transform
+    # them to observed az/alt vectorized, skipping the per-body
+    # SkyCoord.transform_to overhead
+    ra_rad, dec_rad = _radec_arrays(
+        [PLANET_NAMES[i] for i in others], jd_utc, lat, lon)
+    alt_deg, az_deg = observed(ra_rad, dec_rad)
+
+    # Splice the sun back in rather than transforming it a second time
+    indices = np.append(others, PLANET_NAMES.index('sun'))
+    alt_deg = np.append(alt_deg, sun_alt)
+    az_deg = np.append(az_deg, sun_az)
+
+    # Struct-of-arrays: mask every column with the same horizon filter
+    # instead of growing Python lists per body
+    theta, radius, mask = _project(alt_deg, az_deg)
+    labels = PLANET_LABELS[indices][mask]
+    colors = PLANET_COLORS[indices][mask]
+    return theta, radius, labels, colors, is_night, is_day
+
+
+@st.cache_data(ttl=600, show_spinner=False)
+def compute_rise_set(lat, lon, utc_minute_iso):
+    """Next rise and set time (UTC datetime, or None when the body never
+    crosses the horizon in the coming day) for every tracked body.
+
+    Samples every body's observed altitude on a shared 30-point 24-hour
+    grid — one vectorized ERFA astrometry setup covers the whole grid —
+    and linearly interpolates the horizon crossings. Unlike a fixed-RA/Dec
+    hour-angle formula this follows each body's own motion, so even the
+    moon lands within the table's HH:MM resolution.
+    """
+    time_utc = Time(utc_minute_iso)
+    location = make_location(round(lat, 4), round(lon, 4))
+    offsets = np.linspace(0.0, 24.0, 30)
+    times = time_utc + offsets * u.hour
+
+    # One astrometry context per grid time, shared by all bodies
+    astrom, _ = erfa.apco13(times.jd1, times.jd2, 0.0,
+                            np.radians(lon), np.radians(lat), 0.0,
+                            0.0, 0.0, 0.0, 0.0, 0.0, 0.55)
+
+    alt_grid = np.empty((len(times), len(PLANET_NAMES)))
+    for k, name in enumerate(PLANET_NAMES):
+        body = get_body(name, times, location)
+        ri, di = erfa.atciqz(body.ra.radian, body.dec.radian, astrom)
+        _, zen_rad, _, _, _ = erfa.atioq(ri, di, astrom)
+        alt_grid[:, k] = 90.0 - np.degrees(zen_rad)
+
+    base = time_utc.to_datetime()
+    step_sec = (offsets[1] - offsets[0]) * 3600.0
+    crossings = np.diff(np.sign(alt_grid), axis=0)
+
+    def interpolate(col, j):
+        frac = col[j] / (col[j] - col[j + 1])
+        return base + datetime.timedelta(seconds=(j + float(frac)) * step_sec)
+
+    results = []
+    for k, label in enumerate(PLANET_LABELS):
+        col = alt_grid[:, k]
+        rises = np.flatnonzero(crossings[:, k] > 0)
+        sets = np.flatnonzero(crossings[:, k] < 0)
+        results.append((label,
+                        interpolate(col, rises[0]) if rises.size else None,
+                        interpolate(col, sets[0]) if sets.size else None))
+    return results
+
+
+@st.cache_resource
+def _polar_fig():
+    # Build the figure, axes, ticks and grid once per process; reruns only
+    # update the scatter data instead of reconstructing every artist
+    fig, ax = plt.subplots(subplot_kw={'projection': 'polar'}, figsize=(10, 10))
+
+    ax.set_theta_zero_location("N")
+    ax.set_theta_direction(-1)
+    ax.set_rmax(90)
+    ax.set_rticks([30, 60, 90])
+    ax.set_xticks(np.radians([0, 90, 180, 270]))
+    ax.set_xticklabels(["0° (N)", "90° (E)", "180° (S)", "270° (W)"])
+    ax.grid(True, linestyle="--", alpha=0.6)
+
+    scatter = ax.scatter([], [])
+    # One Text artist per body, created once; render_polar repositions them
+    # instead of constructing new artists every rerun
+    texts = [ax.text(0, 0, '', fontsize=12, ha='right', visible=False)
+             for _ in PLANET_NAMES]
+
+    # One legend handle per body, also created once; the render step just
+    # picks the handles for the currently visible bodies
+    legend_handles = {
+        label: Line2D([0], [0], marker='o', color='w', label=label,
+                      markerfacecolor=color,
+                      markersize=14 if label == "Sun" else 10)
+        for label, color in zip(PLANET_LABELS, PLANET_COLORS)}
+    return fig, ax, scatter, texts, legend_handles
+
+
+def render_polar(sky, time_ist):
+    """Draw the polar visibility plot for a compute_visible() result."""
+    azimuths_rad, altitudes_transformed, labels, colors, is_night, is_day = sky
+
+    fig, ax, scatter, texts, legend_handles = _polar_fig()
+
+    if is_night:
+        ax.set_facecolor('#0a0a23')
+        alpha = 1.0
+    elif is_day:
+        ax.set_facecolor('#b5d0e8')
+        alpha = 0.3
+    else:
+        ax.set_facecolor('#d4727e')
+        alpha = 0.6
+
+    sizes = np.where(labels == "Sun", 200, 100)
+    scatter.set_offsets(np.c_[azimuths_rad, altitudes_transformed])
+    scatter.set_facecolors(colors)
+    scatter.set_sizes(sizes)
+    scatter.set_alpha(alpha)
+
+    for i, text in enumerate(texts):
+        if i < len(labels):
+            text.set_position((azimuths_rad[i], altitudes_transformed[i]))
+            text.set_text(labels[i])
+            text.set_color(colors[i])
+            text.set_alpha(alpha)
+            text.set_visible(True)
+        else:
+            text.set_visible(False)
+
+    ax.legend(handles=[legend_handles[label] for label in labels],
+              loc="upper left", bbox_to_anchor=(-0.2, 1.0), fontsize=10)
+
+    title_color = '#041236'
+    ax.set_title(f"Planets & Sun at {time_ist.strftime('%Y-%m-%d %H:%M IST')}",
+                 fontsize=14, color=title_color, pad=30)
+
+    return fig
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def render_png(lat, lon, utc_minute_iso, time_ist):
+    """Render the polar plot to PNG bytes, cached on the same quantized
+    inputs as compute_visible.
+
+    Cache hits skip both the astronomy and the Agg render; the app just
+    hands the bytes to st.image.
+    """
+    sky = compute_visible(lat, lon, utc_minute_iso)
+    fig = render_polar(sky, time_ist)
+    buf = io.BytesIO()
+    # The figure is the shared cached resource, so it is not closed here
+    fig.savefig(buf, format='png', dpi=100)
+    return buf.getvalue()